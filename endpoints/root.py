@@ -1,13 +1,13 @@
 import azure.functions as func
-import json
+import orjson
 
 def get_root(req: func.HttpRequest) -> func.HttpResponse:
     """Root endpoint"""
     return func.HttpResponse(
-        json.dumps({
+        orjson.dumps({
             "message": "AI Datawrapper Agent API - Running on Azure Functions",
             "version": "1.0.0"
         }),
         status_code=200,
         mimetype="application/json"
-    ) 
\ No newline at end of file
+    ) 